@@ -1,9 +1,17 @@
+import re
+from pathlib import Path
+
 from setuptools import setup, find_packages
-from simfin_tools import __version__
+
+# Read the version without importing the package at build time
+VERSION = re.search(
+    r"""__version__\s*=\s*['"]([^'"]+)['"]""",
+    (Path(__file__).parent / "simfin_tools" / "__init__.py").read_text(),
+).group(1)
 
 setup(
     name="simfin-tools",
-    version="0.1.2",
+    version=VERSION,
     description="A command line tool to retrieve financial data using simfin",
     long_description=open('README.md').read(),
     long_description_content_type="text/markdown",
@@ -16,6 +24,9 @@ setup(
         "pandas",
         "python-dotenv",
     ],
+    extras_require={
+        "arrow": ["pyarrow"],
+    },
     entry_points={
         'console_scripts': [
             'sfin=simfin_tools.cli:main',
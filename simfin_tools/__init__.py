@@ -1,3 +1,3 @@
 """SimFin Tools - A command line tool to retrieve financial data using simfin."""
 
-__version__ = '0.1.0'
\ No newline at end of file
+__version__ = '0.1.2'
\ No newline at end of file
@@ -12,16 +12,54 @@ The warning will be resolved in a future update of the simfin package.
 """
 
 import os
+import gc
+import glob
 import csv
+import time
+import hashlib
+import tempfile
 import warnings
 import argparse
+import threading
+from functools import lru_cache
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
-import simfin as sf
-import pandas as pd
-from dotenv import load_dotenv
+# simfin / pandas / dotenv は読み込みが重いため、必要になった時点で関数内でimportする
 
-load_dotenv()
+# Markdown以外の出力形式。feather/parquet には pyarrow が必要
+FILE_FORMATS = ('csv', 'feather', 'parquet')
+
+# 財務諸表のvariantごとの出力ファイル名の接尾辞
+STATEMENT_SUFFIXES = {'annual': '', 'quarterly': '_q1234', 'ttm': '_ttm'}
+
+# 出力する財務諸表: (データセット, 見出し, ファイル名のタグ)。この順に出力する
+STATEMENTS = (
+    ('income', 'Income Statement', 'pl'),
+    ('balance', 'Balance Sheet', 'bs'),
+    ('cashflow', 'Cash Flow Statement', 'cf'),
+)
+
+# 決算日の株価として出力する列
+PRICE_COLUMNS = ('Close', 'Adj. Close')
+
+# 日付として扱う列
+DATE_COLUMNS = frozenset({'Report Date', 'Date', 'Publish Date', 'Restated Date'})
+
+# Markdownの表で左寄せにする列 (それ以外は右寄せ)
+LEFT_ALIGNED_COLUMNS = DATE_COLUMNS | {'Fiscal Year', 'Fiscal Period', 'Currency'}
+
+# Markdownの表に出さない識別子の列
+ID_COLUMNS = ('Ticker', 'SimFinId')
+
+# bulk CSVのインデックス列 (income/balance/cashflow は Ticker, Report Date)
+BULK_INDEX = {'shareprices': ['Ticker', 'Date'], 'companies': ['Ticker']}
+
+# simfin re-downloads bulk files older than this, so cached slices of them expire too
+CACHE_REFRESH_DAYS = 30
+
+# simfin の読み込み (ダウンロード・進捗表示・警告フィルタの変更) は並行して呼ばないようにする
+SIMFIN_LOCK = threading.Lock()
 
 
 @contextmanager
@@ -38,10 +76,14 @@ def suppress_simfin_warnings():
 
 def format_number(value):
     """Format number with thousands separator for accounting values"""
+    import numpy as np
+    import pandas as pd
     if pd.isna(value):
         return ""
     try:
-        num = int(float(value))
+        # 以前の DataFrame.round(2) と同じく np.round で2桁に丸めてから切り捨てる
+        # (x100した株価などの浮動小数点誤差を吸収する)
+        num = int(np.round(float(value), 2))
         return f"{num:,}"
     except (ValueError, TypeError):
         return str(value)
@@ -49,16 +91,20 @@ def format_number(value):
 
 def format_price(value):
     """Format price with 2 decimal places and multiply by 100 to account for splits"""
+    import numpy as np
+    import pandas as pd
     if pd.isna(value):
         return ""
     try:
-        return f"{float(value) * 100:.2f}"
+        # x100済みの株価を以前の DataFrame.round(2) と同じく2桁に丸めてから、さらに100倍する
+        return f"{np.round(float(value), 2) * 100:.2f}"
     except (ValueError, TypeError):
         return str(value)
 
 
 def format_date(value):
     """Format date without time component"""
+    import pandas as pd
     if pd.isna(value):
         return ""
     try:
@@ -67,8 +113,52 @@ def format_date(value):
         return str(value)
 
 
+def is_integral(values):
+    """NaN を除いた全ての値が int64 で正確に表せる整数かどうか"""
+    import numpy as np
+    finite = values[~np.isnan(values)]
+    return bool(np.all((finite == np.trunc(finite)) & (np.abs(finite) < 2 ** 53)))
+
+
+def format_numbers(series):
+    """format_number を列全体に適用する。数値列はセルごとの pd.isna / float 変換を行わない"""
+    import numpy as np
+    import pandas as pd
+    if series.dtype.kind in 'iu':
+        return [f"{num:,}" for num in series.tolist()]
+    if not pd.api.types.is_numeric_dtype(series.dtype):
+        return [format_number(value) for value in series]
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    isna = np.isnan(values)
+    if is_integral(values):
+        # 整数値だけなら丸めは不要
+        nums = np.where(isna, 0, values).astype(np.int64).tolist()
+    else:
+        nums = [0 if na else int(value) for value, na in zip(np.round(values, 2).tolist(), isna.tolist())]
+    return ["" if na else f"{num:,}" for num, na in zip(nums, isna.tolist())]
+
+
+def format_prices(series):
+    """format_price を列全体に適用する"""
+    import numpy as np
+    import pandas as pd
+    if not pd.api.types.is_numeric_dtype(series.dtype):
+        return [format_price(value) for value in series]
+    values = np.round(series.to_numpy(dtype=float, na_value=np.nan), 2) * 100
+    return ["" if value != value else f"{value:.2f}" for value in values.tolist()]
+
+
+def format_dates(values, na=""):
+    """format_date を列 (またはインデックス) 全体に適用する"""
+    import pandas as pd
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return pd.Series(values).dt.strftime('%Y-%m-%d').fillna(na).tolist()
+    return [format_date(value) for value in values]
+
+
 def dataframe_to_markdown(df, title, is_price_data=False):
     """Convert DataFrame to Markdown table with proper formatting"""
+    import pandas as pd
     simfin_id = (
         df.index.get_level_values('SimFinId')[0]
         if 'SimFinId' in df.index.names else None
@@ -77,75 +167,352 @@ def dataframe_to_markdown(df, title, is_price_data=False):
     md = [f"## {title}" + (f" (SimFinId: {simfin_id})" if simfin_id is not None else "")]
     md.append("")
     
-    # DataFrameのインデックスから Ticker, SimFinId を除いたコピーを作成
-    df_copy = df.copy()
-    if isinstance(df_copy.index, pd.MultiIndex):
-        index_names = [name for name in df_copy.index.names if name not in ['Ticker', 'SimFinId']]
-        df_copy = df_copy.reset_index()
-        for col in ['Ticker', 'SimFinId']:
-            if col in df_copy.columns:
-                df_copy = df_copy.drop(col, axis=1)
-        if index_names:
-            df_copy = df_copy.set_index(index_names)
+    # インデックスと列から Ticker, SimFinId を除く。値はコピーせず、インデックスだけを作り直す
+    view = df
+    if isinstance(df.index, pd.MultiIndex):
+        dropped = [name for name in df.index.names if name in ID_COLUMNS]
+        if len(dropped) == df.index.nlevels:
+            view = df.reset_index(drop=True)
+        elif dropped:
+            view = df.droplevel(dropped)
+        view = view.drop(columns=[col for col in ID_COLUMNS if col in view.columns])
     
-    headers = (df_copy.index.names if isinstance(df_copy.index, pd.MultiIndex) else [df_copy.index.name])
+    headers = (view.index.names if isinstance(view.index, pd.MultiIndex) else [view.index.name])
     headers = [h for h in headers if h is not None]
-    headers.extend(df_copy.columns)
+    headers.extend(view.columns)
     md.append("| " + " | ".join(headers) + " |")
     
-    alignments = []
-    for col in headers:
-        if col in ['Report Date', 'Date', 'Fiscal Year', 'Fiscal Period', 'Currency', 'Publish Date', 'Restated Date']:
-            alignments.append(":-")  # Left align
-        else:
-            alignments.append("-:")  # Right align
+    alignments = [":-" if col in LEFT_ALIGNED_COLUMNS else "-:" for col in headers]
     md.append("| " + " | ".join(alignments) + " |")
     
-    for idx, row in df_copy.iterrows():
-        if isinstance(idx, tuple):
-            index_values = [str(v) for v in idx]
+    # セルは列単位でまとめて整形し、最後に行ごとに結合する
+    cells = []
+    for i, name in enumerate(view.index.names):
+        level = view.index.get_level_values(i)
+        if name in DATE_COLUMNS:
+            # インデックスの NaT は従来どおり 'NaT' と表示する
+            cells.append(format_dates(level, na='NaT') if level.dtype.kind == 'M'
+                         else [format_date(str(v)) for v in level])
         else:
-            index_values = [str(idx)]
-        
-        formatted_index_values = []
-        for i, value in enumerate(index_values):
-            if df_copy.index.names[i] in ['Report Date', 'Date']:
-                formatted_index_values.append(format_date(value))
-            else:
-                formatted_index_values.append(value)
-        
-        formatted_values = []
-        for col in df_copy.columns:
-            value = row[col]
-            if col in ['Report Date', 'Date', 'Publish Date', 'Restated Date']:
-                formatted_values.append(format_date(value))
-            elif is_price_data and col in ['Close', 'Adj. Close']:
-                formatted_values.append(format_price(value))
-            else:
-                formatted_values.append(format_number(value))
-        
-        row_values = formatted_index_values + formatted_values
-        md.append("| " + " | ".join(row_values) + " |")
+            cells.append([str(v) for v in level])
+    for j, col in enumerate(view.columns):
+        series = view.iloc[:, j]
+        if col in DATE_COLUMNS:
+            cells.append(format_dates(series))
+        elif is_price_data and col in PRICE_COLUMNS:
+            cells.append(format_prices(series))
+        else:
+            cells.append(format_numbers(series))
+    md.extend("| " + " | ".join(row) + " |" for row in zip(*cells))
     
     md.append("")
     return "\n".join(md)
 
 
-def save_dataframe(df, filename, index=True):
+def arrow_csv_column(series):
+    """
+    pandas の to_csv (float_format='%.2f', QUOTE_NONNUMERIC) と同じ表記になるArrow配列に変換する。
+    文字列にした値は write_csv で引用符付きになる。対応していない型なら None を返す。
+    """
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    dtype = series.dtype
+    if dtype.kind == 'f':
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        isna = np.isnan(values)
+        if is_integral(values) and not np.signbit(values[values == 0]).any():
+            # 財務データはほとんどが整数値なので、'%.2f' の書式化を省いて整数の文字列に '.00' を付ける
+            text = np.char.add(np.where(isna, 0, values).astype(np.int64).astype(str), '.00')
+        else:
+            text = np.char.mod('%.2f', values)
+        return pa.array(np.where(isna, '', text), type=pa.string())
+    if dtype.kind in 'iu' and isinstance(dtype, np.dtype):
+        return pa.array(series.to_numpy())
+    if dtype.kind == 'M':
+        dates = series.dropna()
+        if not (dates == dates.dt.normalize()).all():
+            return None  # 時刻を含む場合 pandas は時刻まで出力する
+        return pa.array(series.dt.strftime('%Y-%m-%d').fillna('').tolist(), type=pa.string())
+    if pd.api.types.is_string_dtype(dtype) and pd.api.types.is_string_dtype(series):
+        return pa.array(series.astype(object).where(series.notna(), '').tolist(), type=pa.string())
+    return None
+
+
+def write_csv_arrow(df, filepath, index=True):
+    """
+    save_dataframe と同じ内容のCSVをPyArrowで書き出す。
+    pyarrow が無いか、対応していない列があれば何もせず False を返す。
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return False
+    flat = df.reset_index() if index else df
+    if index and any(name is None for name in df.index.names):
+        return False
+    columns = {}
+    for i, name in enumerate(flat.columns):
+        array = arrow_csv_column(flat.iloc[:, i])
+        if array is None or not isinstance(name, str) or name in columns:
+            return False
+        columns[name] = array
+    pacsv.write_csv(
+        pa.table(columns),
+        filepath,
+        write_options=pacsv.WriteOptions(quoting_style='needed', eol=os.linesep),
+    )
+    return True
+
+
+def save_dataframe(df, basename, index=True, fmt='csv'):
     """Helper function to save dataframes with consistent formatting"""
     output_dir = os.environ.get("SIMFIN_OUTPUT_DIR", ".")
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    filepath = os.path.join(output_dir, filename)
-    df.to_csv(
-        filepath,
-        sep=',',
-        index=index,
-        float_format='%.2f',
-        encoding='utf-8',
-        quoting=csv.QUOTE_NONNUMERIC,
-        doublequote=True
+    # 複数のスレッドから同時に呼ばれるので、既に作られていてもエラーにしない
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, f"{basename}.{fmt}")
+    if fmt == 'feather':
+        # feather はデフォルトのRangeIndexしか保存できない
+        (df.reset_index() if index else df.reset_index(drop=True)).to_feather(filepath)
+    elif fmt == 'parquet':
+        df.to_parquet(filepath, index=index)
+    elif not (os.environ.get("SIMFIN_FAST_IO") and write_csv_arrow(df, filepath, index=index)):
+        # 大きなバッファで書き込み、pandas の既定 (約10万セル) より大きい単位で行をまとめて文字列化する
+        with open(filepath, 'w', encoding='utf-8', buffering=1 << 20, newline='') as f:
+            df.to_csv(
+                f,
+                sep=',',
+                index=index,
+                float_format='%.2f',
+                quoting=csv.QUOTE_NONNUMERIC,
+                doublequote=True,
+                chunksize=65536
+            )
+
+
+class Output:
+    """
+    1回分の出力先。md ならセクションを作るたびにMarkdownファイルへ書き込み、それ以外は
+    バックグラウンドのスレッドでファイルに書き出して次のデータの処理と重ねる。
+    ファイルはそれぞれ独立しているので、複数のスレッドで並行して書き出す。
+    """
+
+    def __init__(self, fmt, md_path=None, header=()):
+        self.fmt = fmt
+        self.md_path = md_path
+        self.header = list(header)
+        self.saved = []
+        self._md_file = None
+        self._writer = None
+        self._pending = []
+
+    def emit(self, df, title, basename, tag, is_price_data=False):
+        """df を出力し、tag を保存済みとして記録する"""
+        if self.fmt == 'md':
+            self._write_markdown(dataframe_to_markdown(df, title, is_price_data=is_price_data))
+        else:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=4)
+            self._pending.append((basename, tag, self._writer.submit(save_dataframe, df, basename, fmt=self.fmt)))
+        self.saved.append(tag)
+
+    def _write_markdown(self, section):
+        # 最初のセクションを書くときにファイルを作る (何も保存しなければファイルは作られない)
+        if self._md_file is None:
+            self._md_file = open(self.md_path, 'w', encoding='utf-8', buffering=1 << 20)
+            self._md_file.write("\n".join(self.header + [section]))
+        else:
+            self._md_file.write("\n" + section)
+
+    def close(self):
+        """書き出しの完了を待つ。失敗したものは警告を出して保存済みから外す。何度呼んでもよい"""
+        for basename, tag, future in self._pending:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Warning: Could not save {basename}: {e}")
+                self.saved.remove(tag)
+        self._pending = []
+        if self._writer is not None:
+            self._writer.shutdown()
+            self._writer = None
+        if self._md_file is not None:
+            self._md_file.close()
+            self._md_file = None
+        return self.saved
+
+
+def bulk_path(dataset, variant=None):
+    """Path of the SimFin bulk CSV file backing a dataset"""
+    name = f"us-{dataset}" + (f"-{variant}" if variant else "")
+    return os.path.join(os.environ.get("SIMFIN_DATA", "simfin_data"), f"{name}.csv")
+
+
+def fresh_mtime(path):
+    """Return the mtime of a bulk file, or None if it is missing or old enough for simfin to re-download"""
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    if time.time() - mtime >= CACHE_REFRESH_DAYS * 86400:
+        return None
+    return mtime
+
+
+def cache_prefix(dataset, variant, ticker, columns=None):
+    """Common path prefix of all cached versions of a per-ticker slice (or whole dataset, ticker='*')"""
+    cache_dir = os.environ.get(
+        "SIMFIN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "sfin")
+    )
+    key = f"{dataset}|{variant}|{ticker}"
+    if columns is not None:
+        key += "|" + ",".join(columns)
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest())
+
+
+def cache_path(dataset, variant, ticker, mtime, columns=None):
+    """Path of the cached per-ticker slice (or whole dataset, ticker='*') of a bulk file with the given mtime"""
+    return f"{cache_prefix(dataset, variant, ticker, columns)}-{mtime:.6f}.pkl"
+
+
+def read_bulk_csv(path, index, columns=None):
+    """Read a SimFin bulk CSV with PyArrow's multi-threaded reader (requires pyarrow)"""
+    import pyarrow.csv as pacsv
+    table = pacsv.read_csv(
+        path,
+        read_options=pacsv.ReadOptions(use_threads=True),
+        parse_options=pacsv.ParseOptions(delimiter=';'),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=None if columns is None else index + list(columns),
+            strings_can_be_null=True,  # pandas と同じく空欄は欠損値にする
+        ),
     )
+    # YYYY-MM-DD の列は date32 として推論されるので datetime64 に変換する
+    return table.to_pandas(date_as_object=False).set_index(index)
+
+
+def parse_bulk(dataset, variant, columns=None):
+    """
+    bulk CSVを読み込み、Tickerでソートして列名・インデックス名を整える。
+    SIMFIN_FAST_IO が設定されていてbulk CSVが最新なら、simfinではなくPyArrowで直接読み込む。
+    columns: 指定するとインデックスとこれらの列だけを返す。bulk CSVが最新なら他の列は読み込まない
+    """
+    import pandas as pd
+    path = bulk_path(dataset, variant)
+    index = BULK_INDEX.get(dataset, ['Ticker', 'Report Date'])
+    df = None
+    if fresh_mtime(path) is not None:
+        if os.environ.get("SIMFIN_FAST_IO"):
+            try:
+                df = read_bulk_csv(path, index, columns)
+            except ImportError:
+                pass  # pyarrow が無ければ simfin の読み込みにフォールバックする
+        if df is None and columns is not None:
+            # simfin の読み込みと同じく pandas で読むが、必要な列だけを解析する
+            usecols = index + list(columns)
+            df = pd.read_csv(
+                path, sep=';', usecols=usecols,
+                parse_dates=[col for col in usecols if col in DATE_COLUMNS],
+            ).set_index(index)
+    if df is None:
+        # warnings.catch_warnings はスレッドセーフでなく、simfin の進捗表示も混ざるので一つずつ読み込む
+        with SIMFIN_LOCK:
+            sf = setup_simfin()
+            load_func = getattr(sf, f"load_{dataset}")
+            with suppress_simfin_warnings():
+                df = load_func(variant=variant)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(level='Ticker')
+    # 列名・インデックス名の前後の空白はここで一度だけ取り除く
+    df.columns = df.columns.str.strip()
+    df.index.names = [name.strip() if name else name for name in df.index.names]
+    # 日付の列は読み込み時に一度だけ datetime64 にしておく (PyArrow では全て空の列が object になる)
+    for col in DATE_COLUMNS.intersection(df.columns):
+        if df[col].dtype.kind != 'M':
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def read_cache(dataset, variant, ticker, columns=None):
+    """Return the cached DataFrame for the current bulk file, or None if there is none"""
+    import pandas as pd
+    mtime = fresh_mtime(bulk_path(dataset, variant))
+    if mtime is not None:
+        cached = cache_path(dataset, variant, ticker, mtime, columns)
+        if os.path.exists(cached):
+            try:
+                return pd.read_pickle(cached)
+            except Exception:
+                # 壊れた (または別バージョンのpandasで書かれた) キャッシュは捨てて読み直す
+                try:
+                    os.remove(cached)
+                except OSError:
+                    pass
+    return None
+
+
+def write_cache(df, dataset, variant, ticker, columns=None):
+    """Cache df against the bulk file it was read from"""
+    try:
+        cached = cache_path(dataset, variant, ticker, os.path.getmtime(bulk_path(dataset, variant)), columns)
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        # 同じキーを書く別プロセスと一時ファイルがぶつからないよう、一意な名前で書いてから置き換える
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(cached), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                df.to_pickle(f)
+            os.replace(tmp, cached)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        # bulk CSVが更新される前に書かれた同じキーのエントリは二度と使われないので削除する
+        for old in glob.glob(glob.escape(cache_prefix(dataset, variant, ticker, columns)) + "-*.pkl"):
+            if old != cached:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass  # 別のプロセスが先に削除した場合など
+    except Exception:
+        pass  # キャッシュは任意なので書き込めなくても (pickle化に失敗しても) 続行する
+
+
+@lru_cache(maxsize=None)
+def load_bulk(dataset, variant, columns=None):
+    """
+    bulkデータセット全体を返す。1プロセス内で一度だけ読み込み、複数ティッカーの処理で共有する (変更しないこと)。
+    解析済みのデータはキャッシュに保存し、bulk CSVが更新されるまでCSVの解析を省く。
+    columns: 必要な列名のタプル。None なら全列
+    """
+    df = read_cache(dataset, variant, '*', columns)
+    if df is None:
+        df = parse_bulk(dataset, variant, columns)
+        write_cache(df, dataset, variant, '*', columns)
+    return df
+
+
+def select_ticker(df, ticker):
+    """Return the rows of a Ticker-sorted DataFrame for one ticker without scanning the whole index"""
+    try:
+        # コピーしないと切り出した行がbulk全体の配列を参照し続け、解放できなくなる
+        return df.xs(ticker, level='Ticker', drop_level=False).copy()
+    except KeyError:
+        # 存在しないティッカーはハッシュ引きだけで分かる。空のスライスもbulkの配列を参照するのでコピーする
+        return df.iloc[:0].copy()
+
+
+def cached_load(dataset, variant, ticker, columns=None):
+    """
+    指定ティッカーの行だけを返す。bulk CSVが更新されていなければキャッシュから読み込む。
+    dataset: simfinのデータセット名 (income, balance, cashflow, shareprices)
+    columns: 必要な列名のタプル。None なら全列
+    """
+    df = read_cache(dataset, variant, ticker, columns)
+    if df is None:
+        df = select_ticker(load_bulk(dataset, variant, columns), ticker)
+        write_cache(df, dataset, variant, ticker, columns)
+    return df
 
 
 def create_parser():
@@ -155,242 +522,246 @@ def create_parser():
         usage='%(prog)s [options] <command> [<args>]'
     )
     parser.add_argument('--md', action='store_true', help='Output in Markdown format')
+    parser.add_argument('--format', choices=FILE_FORMATS, default='csv',
+                        help='File format for non-Markdown output (default: csv)')
+    parser.add_argument('--fast-io', action='store_true',
+                        help='Read SimFin bulk files and write CSV output with PyArrow (requires pyarrow)')
     
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
+    # 各サブコマンドは handler を持ち、main() はそれを呼び出すだけ (help は handler なし)
     subparsers.add_parser('help', help='Show this help message')
     
     list_parser = subparsers.add_parser('list', help='List or search companies')
     list_parser.add_argument('search_term', nargs='?', default='', help='Search term for company names')
+    list_parser.set_defaults(handler=run_list)
     
     fy_parser = subparsers.add_parser('fy', help='Retrieve full year financial data')
-    fy_parser.add_argument('ticker', help='Company ticker symbol')
+    fy_parser.add_argument('tickers', nargs='+', metavar='ticker', help='Company ticker symbol(s)')
+    fy_parser.set_defaults(handler=run_statements, variant='annual')
     
     q_parser = subparsers.add_parser('q', help='Retrieve quarterly financial data')
-    q_parser.add_argument('ticker', help='Company ticker symbol')
+    q_parser.add_argument('tickers', nargs='+', metavar='ticker', help='Company ticker symbol(s)')
+    q_parser.set_defaults(handler=run_statements, variant='quarterly')
     
     ttm_parser = subparsers.add_parser('ttm', help='Retrieve trailing twelve months financial data')
-    ttm_parser.add_argument('ticker', help='Company ticker symbol')
+    ttm_parser.add_argument('tickers', nargs='+', metavar='ticker', help='Company ticker symbol(s)')
+    ttm_parser.set_defaults(handler=run_statements, variant='ttm')
     
     price_parser = subparsers.add_parser('price', help='Retrieve all available price data')
-    price_parser.add_argument('ticker', help='Company ticker symbol')
+    price_parser.add_argument('tickers', nargs='+', metavar='ticker', help='Company ticker symbol(s)')
+    price_parser.set_defaults(handler=run_prices)
     
     return parser
 
 
+@lru_cache(maxsize=None)
+def load_env():
+    """Load .env and return the SimFin API key (raises KeyError if it is not set)."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.environ["SIMFIN_API_KEY"]
+
+
+@lru_cache(maxsize=None)
 def setup_simfin():
-    """Set API key and data directory for simfin."""
-    sf.set_api_key(os.environ["SIMFIN_API_KEY"])
+    """
+    Set API key and data directory for simfin, and return the simfin module.
+    キャッシュから読めるときは simfin 自体をimportしないよう、実際に使う直前に呼ぶ。
+    """
+    import simfin as sf
+    sf.set_api_key(load_env())
     data_dir = os.environ.get("SIMFIN_DATA", "simfin_data")
     sf.set_data_dir(data_dir)
+    return sf
+
+
+@lru_cache(maxsize=None)
+def find_shares_columns(columns):
+    """損益計算書の列名タプルから株式数の列 (先頭2つ) を求める。スキーマごとに一度だけ計算される"""
+    return tuple(col for col in columns if 'Shares' in col)[:2]
 
 
-def process_statement(load_func, ticker, variant, suffix, title, file_tag, markdown, md_list, saved_files):
+@lru_cache(maxsize=None)
+def find_price_columns(columns):
+    """株価データの列名タプルのうち出力対象の価格列を返す"""
+    return tuple(col for col in PRICE_COLUMNS if col in columns)
+
+
+def process_statement(load, ticker, suffix, title, file_tag, out):
     """
     共通の財務データの取得・整形・出力処理。
-    load_func: simfinのデータ読み込み関数
+    load: ティッカーのDataFrameを返す呼び出し可能オブジェクト (Future.resultなど)
     """
     try:
-        with suppress_simfin_warnings():
-            df = load_func(variant=variant)
-        df = df[df.index.get_level_values('Ticker') == ticker]
+        df = load()
         if df.empty:
             return None
-        df = df.round(2)
-        df.columns = [col.strip() for col in df.columns]
-        df.index.names = [name.strip() for name in df.index.names]
-        if markdown:
-            md_list.append(dataframe_to_markdown(df, title))
-        else:
-            filename = f"{ticker}_{file_tag}{suffix}.csv"
-            save_dataframe(df, filename)
-        saved_files.append(file_tag)
+        out.emit(df, title, f"{ticker}_{file_tag}{suffix}", file_tag)
         return df
     except Exception as e:
         print(f"Warning: Could not load {title} data: {e}")
         return None
 
 
-def process_shares_data(pl, ticker, suffix, markdown, md_list, saved_files):
+def process_shares_data(pl, ticker, suffix, out):
     """株式データの抽出と出力処理"""
     try:
         if pl is not None:
-            shares_cols = [col for col in pl.columns if 'Shares' in col]
+            shares_cols = find_shares_columns(tuple(pl.columns))
             if len(shares_cols) >= 2:
-                shares_data = pl[shares_cols[:2]]
-                shares_data.columns = ['Common Shares Outstanding', 'Weighted Average Shares']
-                shares_data = shares_data.round(2)
-                shares_data.columns = [col.strip() for col in shares_data.columns]
-                shares_data.index.names = [name.strip() for name in shares_data.index.names]
-                if markdown:
-                    md_list.append(dataframe_to_markdown(shares_data, "Share Data"))
-                else:
-                    save_dataframe(shares_data, f"{ticker}_shares{suffix}.csv")
-                saved_files.append("shares")
+                shares_data = pl[list(shares_cols)].set_axis(
+                    ['Common Shares Outstanding', 'Weighted Average Shares'], axis=1
+                )
+                out.emit(shares_data, "Share Data", f"{ticker}_shares{suffix}", "shares")
     except Exception as e:
         print(f"Warning: Could not extract shares data: {e}")
 
 
-def process_price_data(ticker, pl, suffix, markdown, md_list, saved_files):
+def process_price_data(load, ticker, pl, suffix, out):
     """株価データの取得と出力処理"""
     try:
         if pl is not None:
             fiscal_dates = pl.index.get_level_values('Report Date').unique()
-            with suppress_simfin_warnings():
-                prices = sf.load_shareprices(variant='daily')
-            prices = prices[prices.index.get_level_values('Ticker') == ticker]
-            if not prices.empty:
-                price_data_list = []
-                for date in fiscal_dates:
-                    mask = prices.index.get_level_values('Date') <= date
-                    if mask.any():
-                        closest_date = prices[mask].index.get_level_values('Date').max()
-                        price_row = prices[prices.index.get_level_values('Date') == closest_date]
-                        if not price_row.empty:
-                            price_data_list.append(price_row)
-                if price_data_list:
-                    price_data = pd.concat(price_data_list)
-                    price_columns = [col for col in ['Close', 'Adj. Close'] if col in price_data.columns]
-                    if price_columns:
-                        price_data = price_data[price_columns]
-                        price_data = (price_data * 100).round(2)
-                        price_data.columns = [col.strip() for col in price_data.columns]
-                        price_data.index.names = [name.strip() for name in price_data.index.names]
-                        if markdown:
-                            md_list.append(dataframe_to_markdown(price_data, "Price Data", is_price_data=True))
-                        else:
-                            save_dataframe(price_data, f"{ticker}_price{suffix}.csv")
-                        saved_files.append("price")
+            prices = load()
+            price_columns = find_price_columns(tuple(prices.columns))
+            if not prices.empty and price_columns:
+                # 各決算日以前で最も近い取引日の行位置を二分探索でまとめて求め、一度に取り出す
+                dates = prices.index.get_level_values('Date')
+                pos = dates.searchsorted(fiscal_dates.dropna().sort_values(), side='right') - 1
+                price_data = prices.iloc[pos[pos >= 0]][list(price_columns)]
+                if not price_data.empty:
+                    price_data = price_data * 100
+                    out.emit(price_data, "Price Data", f"{ticker}_price{suffix}", "price",
+                             is_price_data=True)
     except Exception as e:
         print(f"Warning: Could not load Price data: {e}")
 
-def process_all_price_data(ticker, markdown, md_list, saved_files):
+def process_all_price_data(ticker, out):
     """全期間の株価データを取得・出力する関数"""
     try:
-        with suppress_simfin_warnings():
-            prices = sf.load_shareprices(variant='daily')
-        prices = prices[prices.index.get_level_values('Ticker') == ticker]
+        prices = cached_load('shareprices', 'daily', ticker)
         if not prices.empty:
-            prices = (prices * 100).round(2)
-            if markdown:
-                md_list.append(dataframe_to_markdown(prices, "All Price Data", is_price_data=True))
-            else:
-                output_dir = os.environ.get("SIMFIN_OUTPUT_DIR", ".")
-                filepath = os.path.join(output_dir, f"{ticker}_price_all.csv")
-                prices.to_csv(filepath,
-                    sep=',',
-                    index=True,
-                    float_format='%.2f',
-                    encoding='utf-8',
-                    quoting=csv.QUOTE_NONNUMERIC,
-                    doublequote=True
-                )
-            saved_files.append("price")
-            return True
-        return False
+            prices = prices * 100
+            out.emit(prices, "All Price Data", f"{ticker}_price_all", "price", is_price_data=True)
     except Exception as e:
         print(f"Warning: Could not load Price data: {e}")
-        return False
 
 
-def main():
-    parser = create_parser()
-    args = parser.parse_args()
-    
-    if args.command is None or args.command == 'help':
-        parser.print_help()
-        return
+def process_ticker(ticker, variant, suffix, fmt, release_bulk=False):
+    """
+    1銘柄分の財務諸表・株式データ・株価データを取得して出力する。
+    release_bulk: 最後の銘柄ならTrue。読み込み後、整形・出力の前にbulkデータを解放する
+    """
+    md_filename = f"{ticker}{suffix}.md"
+    out = Output(fmt, md_path=md_filename, header=[f"# {ticker}", ""])
     
-    if args.command == 'list':
-        setup_simfin()
-        try:
-            companies = sf.load_companies()
-            search_term = args.search_term.lower()
-            if search_term:
-                name_mask = companies['Company Name'].str.lower().str.contains(search_term, na=False)
-                ticker_mask = companies.index.str.lower().str.contains(search_term, na=False)
-                companies = companies[name_mask | ticker_mask]
-            if companies.empty:
-                print(f"No companies found matching '{search_term}'")
-            else:
-                result = companies[['Company Name']].copy()
-                result.columns = ['Name']
-                print(result)
-        except Exception as e:
-            print(f"Error retrieving companies list: {e}")
-        return
-
-    elif args.command in ['fy', 'q', 'ttm']:
-        ticker = args.ticker
-        variant = {'fy': 'annual', 'q': 'quarterly', 'ttm': 'ttm'}[args.command]
-        suffix = {'fy': '', 'q': '_q1234', 'ttm': '_ttm'}[args.command]
+    try:
+        # 各データセットの読み込みは互いに独立しているので並行して行う
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            loads = {
+                dataset: executor.submit(cached_load, dataset, variant, ticker)
+                for dataset, _, _ in STATEMENTS
+            }
+            # 決算日の株価には価格列しか使わないので、株価データはその列だけを読み込む
+            loads['shareprices'] = executor.submit(cached_load, 'shareprices', 'daily', ticker, PRICE_COLUMNS)
         
-        setup_simfin()
-        saved_files = []
-        markdown_content = []
+        if release_bulk:
+            load_bulk.cache_clear()
+            gc.collect()
         
-        if args.md:
-            markdown_content.append(f"# {ticker}")
-            markdown_content.append("")
+        # 損益計算書・貸借対照表・キャッシュフロー計算書の取得
+        statements = {
+            dataset: process_statement(loads[dataset].result, ticker, suffix, title, file_tag, out)
+            for dataset, title, file_tag in STATEMENTS
+        }
+        pl = statements['income']
         
+        # 株式データの抽出(損益計算書から)
+        process_shares_data(pl, ticker, suffix, out)
+        
+        # 株価データの取得
+        process_price_data(loads['shareprices'].result, ticker, pl, suffix, out)
+        
+        # バックグラウンドの書き出しを待ち、失敗があればここで警告する
+        saved_files = out.close()
+        if not saved_files:
+            print(f"No data could be saved for {ticker}")
+        elif fmt == 'md':
+            print(f"Successfully saved markdown file: {md_filename}")
+        else:
+            print(f"Successfully saved the following datasets for {ticker}: {', '.join(saved_files)}")
+    except Exception as e:
+        print(f"Error retrieving data for {ticker}: {e}")
+    finally:
+        out.close()
+
+
+def run_list(args, fmt):
+    """list: 会社の一覧表示・検索"""
+    load_env()
+    try:
+        companies = load_bulk('companies', None)
+        search_term = args.search_term
+        if search_term:
+            # 小文字化したコピーを作らず、正規表現も使わずに部分一致で検索する
+            name_mask = companies['Company Name'].str.contains(search_term, case=False, regex=False, na=False)
+            ticker_mask = companies.index.str.contains(search_term, case=False, regex=False, na=False)
+            companies = companies[name_mask | ticker_mask]
+        if companies.empty:
+            print(f"No companies found matching '{search_term}'")
+        else:
+            result = companies[['Company Name']].copy()
+            result.columns = ['Name']
+            print(result)
+    except Exception as e:
+        print(f"Error retrieving companies list: {e}")
+
+
+def run_statements(args, fmt):
+    """fy/q/ttm 共通の処理。args.variant (annual, quarterly, ttm) だけが異なる"""
+    suffix = STATEMENT_SUFFIXES[args.variant]
+    load_env()
+    
+    # Derived Metricsは現プランでは利用不可
+    print("Note: Derived metrics are not available in the current plan. Please upgrade to access this feature.")
+    
+    # bulkデータはload_bulkで一度だけ読み込まれ、全ティッカーで共有される
+    for i, ticker in enumerate(args.tickers, 1):
+        process_ticker(ticker, args.variant, suffix, fmt, release_bulk=(i == len(args.tickers)))
+
+
+def run_prices(args, fmt):
+    """price: 全期間の株価データを出力する"""
+    load_env()
+    for ticker in args.tickers:
+        md_filename = f"{ticker}_price_all.md"
+        out = Output(fmt, md_path=md_filename, header=[f"# {ticker} Price Data", ""])
         try:
-            # 損益計算書の取得
-            pl = process_statement(sf.load_income, ticker, variant, suffix,
-                                   "Income Statement", "pl", args.md, markdown_content, saved_files)
-            
-            # 貸借対照表の取得
-            process_statement(sf.load_balance, ticker, variant, suffix,
-                              "Balance Sheet", "bs", args.md, markdown_content, saved_files)
-            
-            # キャッシュフロー計算書の取得
-            process_statement(sf.load_cashflow, ticker, variant, suffix,
-                              "Cash Flow Statement", "cf", args.md, markdown_content, saved_files)
-            
-            # Derived Metricsは現プランでは利用不可
-            print("Note: Derived metrics are not available in the current plan. Please upgrade to access this feature.")
-            
-            # 株式データの抽出(損益計算書から)
-            process_shares_data(pl, ticker, suffix, args.md, markdown_content, saved_files)
-            
-            # 株価データの取得
-            process_price_data(ticker, pl, suffix, args.md, markdown_content, saved_files)
-            
-            if not saved_files:
-                print(f"No data could be saved for {ticker}")
-                return
-            else:
-                if args.md:
-                    md_suffix = suffix  # 同じsuffixを利用
-                    md_filename = f"{ticker}{md_suffix}.md"
-                    with open(md_filename, 'w', encoding='utf-8') as f:
-                        f.write("\n".join(markdown_content))
-                    print(f"Successfully saved markdown file: {md_filename}")
-                else:
-                    print(f"Successfully saved the following datasets for {ticker}: {', '.join(saved_files)}")
-        except Exception as e:
-            print(f"Error retrieving data for {ticker}: {e}")
-            return
-    elif args.command == 'price':
-        ticker = args.ticker
-        setup_simfin()
-        saved_files = []
-        if args.md:
-            markdown_content = [f"# {ticker} Price Data", ""]
-            if process_all_price_data(ticker, True, markdown_content, saved_files):
-                md_filename = f"{ticker}_price_all.md"
-                with open(md_filename, 'w', encoding='utf-8') as f:
-                    f.write("\n".join(markdown_content))
-                print(f"Successfully saved markdown file: {md_filename}")
-            else:
-                print(f"No price data found for {ticker}")
+            process_all_price_data(ticker, out)
+        finally:
+            saved_files = out.close()
+        if not saved_files:
+            print(f"No price data found for {ticker}")
+        elif fmt == 'md':
+            print(f"Successfully saved markdown file: {md_filename}")
         else:
-            if process_all_price_data(ticker, False, [], saved_files):
-                print(f"Successfully saved price data for {ticker}")
-            else:
-                print(f"No price data found for {ticker}")
-    else:
+            print(f"Successfully saved price data for {ticker}")
+
+
+def main():
+    parser = create_parser()
+    args = parser.parse_args()
+    
+    handler = getattr(args, 'handler', None)
+    if handler is None:
         parser.print_help()
         return
+    
+    if args.fast_io:
+        os.environ["SIMFIN_FAST_IO"] = "1"
+    fmt = 'md' if args.md else args.format
+    handler(args, fmt)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+"""Regression checks for the Markdown output of simfin_tools.cli"""
+import numpy as np
+import pandas as pd
+
+from simfin_tools.cli import dataframe_to_markdown
+
+
+def price_frame():
+    """x100 済みの株価 (process_price_data と同じ形)。小数3桁以上の値を含む"""
+    index = pd.MultiIndex.from_arrays(
+        [['AAPL'] * 3, [111] * 3, pd.to_datetime(['2018-09-28', '2018-12-31', '2019-03-29'])],
+        names=['Ticker', 'SimFinId', 'Date'],
+    )
+    return pd.DataFrame(
+        {'Close': [21779.0, 15785.0, 18972.4999], 'Adj. Close': [21510.0087, 15599.123456, np.nan]},
+        index=index,
+    )
+
+
+def test_price_markdown_rounds_before_scaling():
+    # 以前は DataFrame.round(2) をしてから format_price で100倍していた
+    md = dataframe_to_markdown(price_frame(), "Price Data", is_price_data=True)
+    assert "| 2018-09-28 | 2177900.00 | 2151001.00 |" in md
+    assert "| 2019-03-29 | 1897250.00 |  |" in md
+
+
+def test_markdown_matches_rounded_frame():
+    # 丸めなしの出力は、以前のように round(2) 済みのフレームを渡したときと同じであること
+    df = price_frame()
+    df['Revenue'] = [12.995, 13363.999999, -0.995]
+    for is_price_data in (False, True):
+        assert (dataframe_to_markdown(df, "t", is_price_data=is_price_data)
+                == dataframe_to_markdown(df.round(2), "t", is_price_data=is_price_data))